@@ -0,0 +1,43 @@
+import logging
+
+import pytest
+
+
+# FileHandler stand-in that accepts the same arguments but never opens a file
+class _NullFileHandler(logging.NullHandler):
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+
+# Fixture to keep Calculator's logging setup from opening log files during tests
+@pytest.fixture(scope="session", autouse=True)
+def null_log_file_handler():
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr('logging.FileHandler', _NullFileHandler)
+        yield
+
+
+# Fixture to drive the REPL through pytest's monkeypatch and capsys
+@pytest.fixture
+def repl_io(monkeypatch, capsys, tmp_path):
+    # Keep the REPL's real history file out of the working directory
+    monkeypatch.setenv('CALCULATOR_HISTORY_DIR', str(tmp_path / "history"))
+    monkeypatch.setenv('CALCULATOR_HISTORY_FILE', str(tmp_path / "history/calculator_history.csv"))
+
+    def feed_inputs(inputs):
+        remaining = iter(inputs)
+
+        def fake_input(prompt=""):
+            # Signal end of input once the scripted commands run out
+            try:
+                return next(remaining)
+            except StopIteration:
+                raise EOFError
+
+        monkeypatch.setattr('builtins.input', fake_input)
+
+    def get_printed():
+        # Collect the printed lines once so each assertion is a set lookup
+        return set(capsys.readouterr().out.splitlines())
+
+    return feed_inputs, get_printed
@@ -1,10 +1,8 @@
-import datetime
 from pathlib import Path
-import pandas as pd
 import pytest
 from unittest.mock import Mock, patch, PropertyMock
 from decimal import Decimal
-from tempfile import TemporaryDirectory
+from types import SimpleNamespace
 from app.calculator import Calculator
 from app.calculator_repl import calculator_repl
 from app.calculator_config import CalculatorConfig
@@ -12,31 +10,50 @@ from app.exceptions import OperationError, ValidationError
 from app.history import LoggingObserver, AutoSaveObserver
 from app.operations import OperationFactory
 
-# Fixture to initialize Calculator with a temporary directory for file paths
-@pytest.fixture
-def calculator():
-    with TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        config = CalculatorConfig(base_dir=temp_path)
-
-        # Patch properties to use the temporary directory paths
-        with patch.object(CalculatorConfig, 'log_dir', new_callable=PropertyMock) as mock_log_dir, \
-             patch.object(CalculatorConfig, 'log_file', new_callable=PropertyMock) as mock_log_file, \
-             patch.object(CalculatorConfig, 'history_dir', new_callable=PropertyMock) as mock_history_dir, \
-             patch.object(CalculatorConfig, 'history_file', new_callable=PropertyMock) as mock_history_file:
-            
-            # Set return values to use paths within the temporary directory
-            mock_log_dir.return_value = temp_path / "logs"
-            mock_log_file.return_value = temp_path / "logs/calculator.log"
-            mock_history_dir.return_value = temp_path / "history"
-            mock_history_file.return_value = temp_path / "history/calculator_history.csv"
-            
-            # Return an instance of Calculator with the mocked config
-            yield Calculator(config=config)
+# Operations are stateless strategies, so one instance is shared across tests
+ADD_OP = OperationFactory.create_operation('add')
+
+# CalculatorConfig with the env-driven path properties shadowed by plain attributes
+class _TestConfig(CalculatorConfig):
+    log_dir = log_file = history_dir = history_file = None
+
+# Fixture to initialize Calculator with a temporary directory for file paths.
+# Built once per module and shared across its tests.
+@pytest.fixture(scope="module")
+def calculator(tmp_path_factory):
+    temp_path = tmp_path_factory.mktemp("calculator")
+    config = _TestConfig(base_dir=temp_path)
+
+    # Point the paths at the temporary directory
+    config.log_dir = temp_path / "logs"
+    config.log_file = temp_path / "logs/calculator.log"
+    config.history_dir = temp_path / "history"
+    config.history_file = temp_path / "history/calculator_history.csv"
+
+    # Return an instance of Calculator with the test config
+    return Calculator(config=config)
+
+# Reset the shared Calculator's state before each test
+@pytest.fixture(autouse=True)
+def reset_calculator(calculator):
+    calculator.history.clear()
+    calculator.undo_stack.clear()
+    calculator.redo_stack.clear()
+    calculator.operation_strategy = None
+    calculator.observers.clear()
+    yield
 
 # Test Calculator Initialization
 
-def test_calculator_initialization(calculator):
+def test_calculator_initialization(tmp_path):
+    # Build a fresh instance; the shared fixture has already been reset
+    config = _TestConfig(base_dir=tmp_path)
+    config.log_dir = tmp_path / "logs"
+    config.log_file = tmp_path / "logs/calculator.log"
+    config.history_dir = tmp_path / "history"
+    config.history_file = tmp_path / "history/calculator_history.csv"
+    calculator = Calculator(config=config)
+
     assert calculator.history == []
     assert calculator.undo_stack == []
     assert calculator.redo_stack == []
@@ -71,20 +88,18 @@ def test_remove_observer(calculator):
 # Test Setting Operations
 
 def test_set_operation(calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
-    assert calculator.operation_strategy == operation
+    calculator.set_operation(ADD_OP)
+    assert calculator.operation_strategy == ADD_OP
 
 # Test Performing Operations
 
 def test_perform_operation_addition(calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
+    calculator.set_operation(ADD_OP)
     result = calculator.perform_operation(2, 3)
     assert result == Decimal('5')
 
 def test_perform_operation_validation_error(calculator):
-    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.set_operation(ADD_OP)
     with pytest.raises(ValidationError):
         calculator.perform_operation('invalid', 3)
 
@@ -95,15 +110,13 @@ def test_perform_operation_operation_error(calculator):
 # Test Undo/Redo Functionality
 
 def test_undo(calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
+    calculator.set_operation(ADD_OP)
     calculator.perform_operation(2, 3)
     calculator.undo()
     assert calculator.history == []
 
 def test_redo(calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
+    calculator.set_operation(ADD_OP)
     calculator.perform_operation(2, 3)
     calculator.undo()
     calculator.redo()
@@ -113,23 +126,27 @@ def test_redo(calculator):
 
 @patch('app.calculator.pd.DataFrame.to_csv')
 def test_save_history(mock_to_csv, calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
+    calculator.set_operation(ADD_OP)
     calculator.perform_operation(2, 3)
     calculator.save_history()
     mock_to_csv.assert_called_once()
 
-@patch('app.calculator.pd.read_csv')
+# Stand-in for the DataFrame returned by read_csv; load_history only checks
+# .empty and walks .iterrows(), so no real DataFrame needs to be built
+_LOADED_HISTORY = SimpleNamespace(
+    empty=False,
+    iterrows=lambda: iter([(0, {
+        'operation': 'Addition',
+        'operand1': '2',
+        'operand2': '3',
+        'result': '5',
+        'timestamp': '2024-01-01T12:00:00'
+    })])
+)
+
+@patch('app.calculator.pd.read_csv', return_value=_LOADED_HISTORY)
 @patch('app.calculator.Path.exists', return_value=True)
 def test_load_history(mock_exists, mock_read_csv, calculator):
-    # Mock CSV data to match the expected format in from_dict
-    mock_read_csv.return_value = pd.DataFrame({
-        'operation': ['Addition'],
-        'operand1': ['2'],
-        'operand2': ['3'],
-        'result': ['5'],
-        'timestamp': [datetime.datetime.now().isoformat()]
-    })
     
     # Test the load_history functionality
     try:
@@ -148,33 +165,34 @@ def test_load_history(mock_exists, mock_read_csv, calculator):
 # Test Clearing History
 
 def test_clear_history(calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
+    calculator.set_operation(ADD_OP)
     calculator.perform_operation(2, 3)
     calculator.clear_history()
     assert calculator.history == []
     assert calculator.undo_stack == []
     assert calculator.redo_stack == []
 
-# Test REPL Commands (using patches for input/output handling)
+# Test REPL Commands (using repl_io for input/output handling)
 
-@patch('builtins.input', side_effect=['exit'])
-@patch('builtins.print')
-def test_calculator_repl_exit(mock_print, mock_input):
+def test_calculator_repl_exit(repl_io):
+    feed_inputs, get_printed = repl_io
+    feed_inputs(['exit'])
     with patch('app.calculator.Calculator.save_history') as mock_save_history:
         calculator_repl()
         mock_save_history.assert_called_once()
-        mock_print.assert_any_call("History saved successfully.")
-        mock_print.assert_any_call("Goodbye!")
+    printed = get_printed()
+    assert "History saved successfully." in printed
+    assert "Goodbye!" in printed
 
-@patch('builtins.input', side_effect=['help', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_help(mock_print, mock_input):
+def test_calculator_repl_help(repl_io):
+    feed_inputs, get_printed = repl_io
+    feed_inputs(['help', 'exit'])
     calculator_repl()
-    mock_print.assert_any_call("\nAvailable commands:")
+    assert "Available commands:" in get_printed()
 
-@patch('builtins.input', side_effect=['add', '2', '3', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_addition(mock_print, mock_input):
+def test_calculator_repl_addition(repl_io):
+    feed_inputs, get_printed = repl_io
+    feed_inputs(['add', '2', '3', 'exit'])
     calculator_repl()
-    mock_print.assert_any_call("\nResult: 5")
+    assert "Result: 5" in get_printed()
+
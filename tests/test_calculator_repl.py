@@ -1,10 +1,8 @@
-import datetime
 from pathlib import Path
-import pandas as pd
 import pytest
-from unittest.mock import Mock, patch, PropertyMock
+from unittest.mock import DEFAULT, Mock, patch, PropertyMock
 from decimal import Decimal
-from tempfile import TemporaryDirectory
+from types import SimpleNamespace
 from app.calculator import Calculator
 from app.calculator_repl import calculator_repl
 from app.calculator_config import CalculatorConfig
@@ -12,31 +10,50 @@ from app.exceptions import OperationError, ValidationError
 from app.history import LoggingObserver, AutoSaveObserver
 from app.operations import OperationFactory
 
-# Fixture to initialize Calculator with a temporary directory for file paths
-@pytest.fixture
-def calculator():
-    with TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        config = CalculatorConfig(base_dir=temp_path)
-
-        # Patch properties to use the temporary directory paths
-        with patch.object(CalculatorConfig, 'log_dir', new_callable=PropertyMock) as mock_log_dir, \
-             patch.object(CalculatorConfig, 'log_file', new_callable=PropertyMock) as mock_log_file, \
-             patch.object(CalculatorConfig, 'history_dir', new_callable=PropertyMock) as mock_history_dir, \
-             patch.object(CalculatorConfig, 'history_file', new_callable=PropertyMock) as mock_history_file:
-            
-            # Set return values to use paths within the temporary directory
-            mock_log_dir.return_value = temp_path / "logs"
-            mock_log_file.return_value = temp_path / "logs/calculator.log"
-            mock_history_dir.return_value = temp_path / "history"
-            mock_history_file.return_value = temp_path / "history/calculator_history.csv"
-            
-            # Return an instance of Calculator with the mocked config
-            yield Calculator(config=config)
+# Operations are stateless strategies, so one instance is shared across tests
+ADD_OP = OperationFactory.create_operation('add')
+
+# CalculatorConfig with the env-driven path properties shadowed by plain attributes
+class _TestConfig(CalculatorConfig):
+    log_dir = log_file = history_dir = history_file = None
+
+# Fixture to initialize Calculator with a temporary directory for file paths.
+# Built once per module and shared across its tests.
+@pytest.fixture(scope="module")
+def calculator(tmp_path_factory):
+    temp_path = tmp_path_factory.mktemp("calculator")
+    config = _TestConfig(base_dir=temp_path)
+
+    # Point the paths at the temporary directory
+    config.log_dir = temp_path / "logs"
+    config.log_file = temp_path / "logs/calculator.log"
+    config.history_dir = temp_path / "history"
+    config.history_file = temp_path / "history/calculator_history.csv"
+
+    # Return an instance of Calculator with the test config
+    return Calculator(config=config)
+
+# Reset the shared Calculator's state before each test
+@pytest.fixture(autouse=True)
+def reset_calculator(calculator):
+    calculator.history.clear()
+    calculator.undo_stack.clear()
+    calculator.redo_stack.clear()
+    calculator.operation_strategy = None
+    calculator.observers.clear()
+    yield
 
 # Test Calculator Initialization
 
-def test_calculator_initialization(calculator):
+def test_calculator_initialization(tmp_path):
+    # Build a fresh instance; the shared fixture has already been reset
+    config = _TestConfig(base_dir=tmp_path)
+    config.log_dir = tmp_path / "logs"
+    config.log_file = tmp_path / "logs/calculator.log"
+    config.history_dir = tmp_path / "history"
+    config.history_file = tmp_path / "history/calculator_history.csv"
+    calculator = Calculator(config=config)
+
     assert calculator.history == []
     assert calculator.undo_stack == []
     assert calculator.redo_stack == []
@@ -71,20 +88,18 @@ def test_remove_observer(calculator):
 # Test Setting Operations
 
 def test_set_operation(calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
-    assert calculator.operation_strategy == operation
+    calculator.set_operation(ADD_OP)
+    assert calculator.operation_strategy == ADD_OP
 
 # Test Performing Operations
 
 def test_perform_operation_addition(calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
+    calculator.set_operation(ADD_OP)
     result = calculator.perform_operation(2, 3)
     assert result == Decimal('5')
 
 def test_perform_operation_validation_error(calculator):
-    calculator.set_operation(OperationFactory.create_operation('add'))
+    calculator.set_operation(ADD_OP)
     with pytest.raises(ValidationError):
         calculator.perform_operation('invalid', 3)
 
@@ -95,15 +110,13 @@ def test_perform_operation_operation_error(calculator):
 # Test Undo/Redo Functionality
 
 def test_undo(calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
+    calculator.set_operation(ADD_OP)
     calculator.perform_operation(2, 3)
     calculator.undo()
     assert calculator.history == []
 
 def test_redo(calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
+    calculator.set_operation(ADD_OP)
     calculator.perform_operation(2, 3)
     calculator.undo()
     calculator.redo()
@@ -113,23 +126,27 @@ def test_redo(calculator):
 
 @patch('app.calculator.pd.DataFrame.to_csv')
 def test_save_history(mock_to_csv, calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
+    calculator.set_operation(ADD_OP)
     calculator.perform_operation(2, 3)
     calculator.save_history()
     mock_to_csv.assert_called_once()
 
-@patch('app.calculator.pd.read_csv')
+# Stand-in for the DataFrame returned by read_csv; load_history only checks
+# .empty and walks .iterrows(), so no real DataFrame needs to be built
+_LOADED_HISTORY = SimpleNamespace(
+    empty=False,
+    iterrows=lambda: iter([(0, {
+        'operation': 'Addition',
+        'operand1': '2',
+        'operand2': '3',
+        'result': '5',
+        'timestamp': '2024-01-01T12:00:00'
+    })])
+)
+
+@patch('app.calculator.pd.read_csv', return_value=_LOADED_HISTORY)
 @patch('app.calculator.Path.exists', return_value=True)
 def test_load_history(mock_exists, mock_read_csv, calculator):
-    # Mock CSV data to match the expected format in from_dict
-    mock_read_csv.return_value = pd.DataFrame({
-        'operation': ['Addition'],
-        'operand1': ['2'],
-        'operand2': ['3'],
-        'result': ['5'],
-        'timestamp': [datetime.datetime.now().isoformat()]
-    })
     
     # Test the load_history functionality
     try:
@@ -148,188 +165,141 @@ def test_load_history(mock_exists, mock_read_csv, calculator):
 # Test Clearing History
 
 def test_clear_history(calculator):
-    operation = OperationFactory.create_operation('add')
-    calculator.set_operation(operation)
+    calculator.set_operation(ADD_OP)
     calculator.perform_operation(2, 3)
     calculator.clear_history()
     assert calculator.history == []
     assert calculator.undo_stack == []
     assert calculator.redo_stack == []
 
-# Test REPL Commands (using patches for input/output handling)
-
-@patch('builtins.input', side_effect=['exit'])
-@patch('builtins.print')
-def test_calculator_repl_exit(mock_print, mock_input):
-    with patch('app.calculator.Calculator.save_history') as mock_save_history:
-        calculator_repl()
-        mock_save_history.assert_called_once()
-        mock_print.assert_any_call("History saved successfully.")
-        mock_print.assert_any_call("Goodbye!")
-
-@patch('builtins.input', side_effect=['exit'])
-@patch('builtins.print')
-def test_calculator_repl_exit_negative(mock_print, mock_input):
-    with patch('app.calculator.Calculator.save_history', side_effect=Exception("Simulated failure")) as mock_save_history:
-        calculator_repl()
-        mock_save_history.assert_called_once()
-        mock_print.assert_any_call("Warning: Could not save history: Simulated failure")
-        mock_print.assert_any_call("Goodbye!")
+# Test REPL Commands (using repl_io for input/output handling)
 
-@patch('builtins.input', side_effect=['help', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_help(mock_print, mock_input):
+def test_calculator_repl_help(repl_io):
+    feed_inputs, get_printed = repl_io
+    feed_inputs(['help', 'exit'])
     calculator_repl()
-    mock_print.assert_any_call("\nAvailable commands:")
+    assert "Available commands:" in get_printed()
 
-@patch('builtins.input', side_effect=['add', '2', '3', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_addition(mock_print, mock_input):
+def test_calculator_repl_addition(repl_io):
+    feed_inputs, get_printed = repl_io
+    feed_inputs(['add', '2', '3', 'exit'])
     calculator_repl()
-    mock_print.assert_any_call("\nResult: 5")
-
-@patch('builtins.input', side_effect=['history', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_history_empty(mock_print, mock_input):
-    with patch('app.calculator.Calculator.show_history', return_value=[]):
-        calculator_repl()
-        mock_print.assert_any_call("No calculations in history")
-
-@patch('builtins.input', side_effect=['history', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_history_with_entries(mock_print, mock_input):
-    with patch('app.calculator.Calculator.show_history', return_value=["Addition(2, 2) = 4", "Multiplication(3, 3) = 9"]):
-        calculator_repl()
-        mock_print.assert_any_call("\nCalculation History:")
-        mock_print.assert_any_call("1. Addition(2, 2) = 4")
-        mock_print.assert_any_call("2. Multiplication(3, 3) = 9")
-
-from unittest.mock import patch
-
-@patch('builtins.input', side_effect=['clear', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_clear_history(mock_print, mock_input):
-    with patch('app.calculator.Calculator.clear_history') as mock_clear_history:
-        calculator_repl()
-        mock_clear_history.assert_called_once()
-        mock_print.assert_any_call("History cleared")
-
-from unittest.mock import patch
-
-@patch('builtins.input', side_effect=['undo', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_undo_success(mock_print, mock_input):
-    with patch('app.calculator.Calculator.undo', return_value=True) as mock_undo:
-        calculator_repl()
-        mock_undo.assert_called_once()
-        mock_print.assert_any_call("Operation undone")
-
-@patch('builtins.input', side_effect=['undo', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_undo_fail(mock_print, mock_input):
-    with patch('app.calculator.Calculator.undo', return_value=False) as mock_undo:
-        calculator_repl()
-        mock_undo.assert_called_once()
-        mock_print.assert_any_call("Nothing to undo")
-
-@patch('builtins.input', side_effect=['redo', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_redo_success(mock_print, mock_input):
-    with patch('app.calculator.Calculator.redo', return_value=True) as mock_undo:
-        calculator_repl()
-        mock_undo.assert_called_once()
-        mock_print.assert_any_call("Operation redone")
-
-@patch('builtins.input', side_effect=['redo', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_redo_fail(mock_print, mock_input):
-    with patch('app.calculator.Calculator.redo', return_value=False) as mock_undo:
-        calculator_repl()
-        mock_undo.assert_called_once()
-        mock_print.assert_any_call("Nothing to redo")
-
-@patch('builtins.input', side_effect=['save', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_save_success(mock_print, mock_input):
-    with patch('app.calculator.Calculator.save_history') as mock_save_history:
+    assert "Result: 5" in get_printed()
+
+class TestREPL:
+    """REPL command tests running against a mocked Calculator."""
+
+    # Install every Calculator method the REPL commands touch with one patcher
+    @pytest.fixture(autouse=True)
+    def mock_calculator_methods(self):
+        with patch.multiple(
+            'app.calculator.Calculator',
+            save_history=DEFAULT,
+            load_history=DEFAULT,
+            undo=DEFAULT,
+            redo=DEFAULT,
+            clear_history=DEFAULT,
+            perform_operation=DEFAULT,
+            show_history=DEFAULT
+        ) as mocks:
+            self.mocks = mocks
+            yield mocks
+
+    def test_exit(self, repl_io):
+        feed_inputs, get_printed = repl_io
+        feed_inputs(['exit'])
         calculator_repl()
-        assert mock_save_history.call_count == 2
-        mock_print.assert_any_call("History saved successfully")
-
-from unittest.mock import patch
-
-@patch('builtins.input', side_effect=['save', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_save_failure(mock_print, mock_input):
-    with patch('app.calculator.Calculator.save_history', side_effect=Exception("Simulated error")) as mock_save_history:
+        self.mocks['save_history'].assert_called_once()
+        printed = get_printed()
+        assert "History saved successfully." in printed
+        assert "Goodbye!" in printed
+
+    def test_exit_negative(self, repl_io):
+        feed_inputs, get_printed = repl_io
+        feed_inputs(['exit'])
+        self.mocks['save_history'].side_effect = Exception("Simulated failure")
         calculator_repl()
-
-        # Don't assert call count since it's called again on 'exit'
-        assert mock_save_history.call_count == 2
-
-        mock_print.assert_any_call("Error saving history: Simulated error")
-        mock_print.assert_any_call("Goodbye!")
-
-@patch('builtins.input', side_effect=['load', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_load_failure(mock_print, mock_input):
-    with patch('app.calculator.Calculator.load_history', side_effect=Exception("Simulated load error")) as mock_load_history:
+        self.mocks['save_history'].assert_called_once()
+        printed = get_printed()
+        assert "Warning: Could not save history: Simulated failure" in printed
+        assert "Goodbye!" in printed
+
+    @pytest.mark.parametrize("history,expected", [
+        ([], ["No calculations in history"]),
+        (["Addition(2, 2) = 4", "Multiplication(3, 3) = 9"],
+         ["Calculation History:", "1. Addition(2, 2) = 4", "2. Multiplication(3, 3) = 9"]),
+    ])
+    def test_history(self, repl_io, history, expected):
+        feed_inputs, get_printed = repl_io
+        feed_inputs(['history', 'exit'])
+        self.mocks['show_history'].return_value = history
         calculator_repl()
+        printed = get_printed()
+        for line in expected:
+            assert line in printed
 
-        # load_history() may be called again during 'exit', so don't assert call count
-        assert mock_load_history.call_count == 2
-
-        mock_print.assert_any_call("Error loading history: Simulated load error")
-        mock_print.assert_any_call("Goodbye!")
-
-@patch('builtins.input', side_effect=['load', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_load_success(mock_print, mock_input):
-    with patch('app.calculator.Calculator.load_history') as mock_load_history:
+    def test_clear_history(self, repl_io):
+        feed_inputs, get_printed = repl_io
+        feed_inputs(['clear', 'exit'])
         calculator_repl()
-
-        # load_history() might be called again on exit, so don't assert exact count
-        assert mock_load_history.call_count == 2
-
-        mock_print.assert_any_call("History loaded successfully")
-        mock_print.assert_any_call("Goodbye!")
-
-@patch('builtins.input', side_effect=['add', 'cancel', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_operation_cancel(mock_print, mock_input):
-    with patch('app.calculator.Calculator.perform_operation') as mock_operation:
+        self.mocks['clear_history'].assert_called_once()
+        assert "History cleared" in get_printed()
+
+    @pytest.mark.parametrize("method,return_value,expected", [
+        ("undo", True, "Operation undone"),
+        ("undo", False, "Nothing to undo"),
+        ("redo", True, "Operation redone"),
+        ("redo", False, "Nothing to redo"),
+    ])
+    def test_undo_redo(self, repl_io, method, return_value, expected):
+        feed_inputs, get_printed = repl_io
+        feed_inputs([method, 'exit'])
+        self.mocks[method].return_value = return_value
         calculator_repl()
-
-        mock_operation.assert_not_called()
-        mock_print.assert_any_call("Operation cancelled")
-        mock_print.assert_any_call("Goodbye!")
-
-@patch('builtins.input', side_effect=['add', '5', 'cancel', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_operation_cancel_second(mock_print, mock_input):
-    with patch('app.calculator.Calculator.perform_operation') as mock_operation:
+        self.mocks[method].assert_called_once()
+        assert expected in get_printed()
+
+    # save_history() is called again on 'exit', and load_history() once during
+    # initialization, so each method ends up being called twice
+    @pytest.mark.parametrize("command,method,side_effect,expected", [
+        ("save", "save_history", None, "History saved successfully"),
+        ("save", "save_history", Exception("Simulated error"), "Error saving history: Simulated error"),
+        ("load", "load_history", None, "History loaded successfully"),
+        ("load", "load_history", Exception("Simulated load error"), "Error loading history: Simulated load error"),
+    ])
+    def test_save_load(self, repl_io, command, method, side_effect, expected):
+        feed_inputs, get_printed = repl_io
+        feed_inputs([command, 'exit'])
+        self.mocks[method].side_effect = side_effect
         calculator_repl()
-
-        mock_operation.assert_not_called()
-        mock_print.assert_any_call("Operation cancelled")
-        mock_print.assert_any_call("Goodbye!")
-
-@patch('builtins.input', side_effect=['add', '2', '3', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_validation_or_operation_error(mock_print, mock_input):
-    with patch('app.calculator.Calculator.perform_operation', side_effect=ValidationError("Invalid input")) as mock_perform:
+        assert self.mocks[method].call_count == 2
+        printed = get_printed()
+        assert expected in printed
+        assert "Goodbye!" in printed
+
+    @pytest.mark.parametrize("inputs", [
+        ['add', 'cancel', 'exit'],
+        ['add', '5', 'cancel', 'exit'],
+    ])
+    def test_operation_cancel(self, repl_io, inputs):
+        feed_inputs, get_printed = repl_io
+        feed_inputs(inputs)
         calculator_repl()
-
-        mock_perform.assert_called_once()
-        mock_print.assert_any_call("Error: Invalid input")
-        mock_print.assert_any_call("Goodbye!")
-
-@patch('builtins.input', side_effect=['add', '2', '3', 'exit'])
-@patch('builtins.print')
-def test_calculator_repl_unexpected_exception(mock_print, mock_input):
-    with patch('app.calculator.Calculator.perform_operation', side_effect=Exception("Something went wrong")) as mock_perform:
+        self.mocks['perform_operation'].assert_not_called()
+        printed = get_printed()
+        assert "Operation cancelled" in printed
+        assert "Goodbye!" in printed
+
+    @pytest.mark.parametrize("side_effect,expected", [
+        (ValidationError("Invalid input"), "Error: Invalid input"),
+        (Exception("Something went wrong"), "Unexpected error: Something went wrong"),
+    ])
+    def test_operation_error(self, repl_io, side_effect, expected):
+        feed_inputs, get_printed = repl_io
+        feed_inputs(['add', '2', '3', 'exit'])
+        self.mocks['perform_operation'].side_effect = side_effect
         calculator_repl()
-
-        mock_perform.assert_called_once()
-        mock_print.assert_any_call("Unexpected error: Something went wrong")
-        mock_print.assert_any_call("Goodbye!")
+        self.mocks['perform_operation'].assert_called_once()
+        printed = get_printed()
+        assert expected in printed
+        assert "Goodbye!" in printed